@@ -0,0 +1,30 @@
+import argparse
+import sys
+
+from webchatai.agent.benchmarks import crawler, rag
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m webchatai.agent.benchmarks",
+        description="Offline WebchatAI benchmarks.",
+    )
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    rag.add_arguments(
+        subparsers.add_parser("rag", help="ingest, index load and query latency")
+    )
+    crawler.add_arguments(
+        subparsers.add_parser("crawler", help="crawl throughput on a local site")
+    )
+
+    args = parser.parse_args(argv)
+    if args.benchmark == "rag":
+        return rag.main(args)
+    if args.benchmark == "crawler":
+        return crawler.main(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
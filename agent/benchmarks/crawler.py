@@ -0,0 +1,261 @@
+"""Crawler benchmark against a generated website served on localhost.
+
+Drives ``SitemapCrawler.crawl_sitemap``, ``WebCrawler.get_website_urls`` and
+``WebCrawler.crawl_parallel`` and reports pages/sec, fetch latency
+percentiles, event-loop blocking and peak RSS. The ``WebCrawler`` runs need
+a browser installed for crawl4ai; ``--sitemap-only`` skips them.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+from webchatai.agent.benchmarks.site import SyntheticSite
+from webchatai.agent.benchmarks.utils import (
+    compare_baseline,
+    format_table,
+    latency_summary,
+    load_baseline,
+    peak_rss_mb,
+    save_baseline,
+)
+from webchatai.agent.metrics import CallbackExporter, Metrics
+
+KEY_FIELDS = ["benchmark", "pages"]
+HIGHER_IS_BETTER = ["pages_per_sec"]
+LOWER_IS_BETTER = ["fetch_p50_ms", "fetch_p95_ms", "fetch_p99_ms", "loop_blocked_ms"]
+COLUMNS = KEY_FIELDS + ["crawled", "pages_per_sec", "fetch_p50_ms", "fetch_p95_ms"]
+COLUMNS += ["fetch_p99_ms", "loop_blocked_ms", "max_loop_lag_ms", "peak_rss_mb"]
+
+
+class LoopMonitor:
+    """Measures how long the event loop is blocked while a crawl runs.
+
+    A task sleeps for ``interval`` seconds in a loop. Whenever it wakes up
+    late, the extra delay is time the loop spent running something else
+    without yielding.
+    """
+
+    def __init__(self, interval: float = 0.01, threshold: float = 0.005):
+        self.interval = interval
+        self.threshold = threshold
+        self.blocked = 0.0
+        self.max_lag = 0.0
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - start - self.interval
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.blocked += lag
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+class SpanCollector:
+    def __init__(self):
+        self.spans = []
+        self.counters = {}
+
+    def on_span(self, span):
+        self.spans.append(span)
+
+    def on_sample(self, name, value, tags):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def durations(self, name):
+        return [span.duration for span in self.spans if span.name == name]
+
+
+def _row(benchmark, pages, crawled, elapsed, fetches, monitor=None):
+    return {
+        "benchmark": benchmark,
+        "pages": pages,
+        "crawled": crawled,
+        "pages_per_sec": crawled / elapsed if elapsed else 0.0,
+        **latency_summary(fetches, "fetch"),
+        "loop_blocked_ms": monitor.blocked * 1000 if monitor else 0.0,
+        "max_loop_lag_ms": monitor.max_lag * 1000 if monitor else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def bench_url_utils(site: SyntheticSite, rounds: int = 20) -> dict:
+    from webchatai.agent.crawler import URLUtils
+
+    links = [
+        f"{site.base_url}/page/{link}/?ref={page}#section"
+        for page in range(site.pages)
+        for link in site.page_links(page)
+    ]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for link in links:
+            normalized = URLUtils.normalize_url(link)
+            if URLUtils.is_valid_url(normalized):
+                URLUtils.extract_domain(normalized)
+    elapsed = time.perf_counter() - start
+    return _row("url_utils", site.pages, len(links) * rounds, elapsed, [])
+
+
+def bench_sitemap(site: SyntheticSite) -> dict:
+    from webchatai.agent.crawler import SitemapCrawler
+
+    collector = SpanCollector()
+    Metrics.enable(CallbackExporter(on_span=collector.on_span))
+    start = time.perf_counter()
+    urls = SitemapCrawler().crawl_sitemap(site.base_url)
+    elapsed = time.perf_counter() - start
+    Metrics.disable()
+
+    if len(urls) != site.pages:
+        print(f"warning: sitemap crawl found {len(urls)} of {site.pages} pages")
+    return _row(
+        "crawl_sitemap",
+        site.pages,
+        len(urls),
+        elapsed,
+        collector.durations("sitemap_fetch"),
+    )
+
+
+async def _bench_browser(site: SyntheticSite, options: dict):
+    from crawl4ai import BrowserConfig
+
+    from webchatai.agent.crawler import WebCrawler
+    from webchatai.agent.crawler.config import Crawl4AIConfig
+
+    def make_crawler():
+        return WebCrawler(
+            crawler_config=Crawl4AIConfig(
+                browser_config=BrowserConfig(headless=True, verbose=False),
+                offload_workers=options["offload_workers"],
+            ),
+            politness=0,
+            max_concurrent=options["concurrency"],
+        )
+
+    rows = []
+
+    collector = SpanCollector()
+    Metrics.enable(
+        CallbackExporter(on_span=collector.on_span, on_sample=collector.on_sample)
+    )
+    start = time.perf_counter()
+    async with LoopMonitor() as monitor:
+        await make_crawler().get_website_urls(
+            site.base_url, max_depth=options["max_depth"], max_urls=site.pages
+        )
+    elapsed = time.perf_counter() - start
+    rows.append(
+        _row(
+            "get_website_urls",
+            site.pages,
+            int(collector.counters.get("pages_crawled", 0)),
+            elapsed,
+            collector.durations("fetch"),
+            monitor,
+        )
+    )
+
+    urls = [f"{site.base_url}/page/{page}" for page in range(site.pages)]
+    collector = SpanCollector()
+    Metrics.enable(
+        CallbackExporter(on_span=collector.on_span, on_sample=collector.on_sample)
+    )
+    start = time.perf_counter()
+    async with LoopMonitor() as monitor:
+        await make_crawler().crawl_parallel(urls, "bench")
+    elapsed = time.perf_counter() - start
+    rows.append(
+        _row(
+            "crawl_parallel",
+            site.pages,
+            int(collector.counters.get("pages_crawled", 0)),
+            elapsed,
+            collector.durations("fetch"),
+            monitor,
+        )
+    )
+    Metrics.disable()
+    return rows
+
+
+def add_arguments(parser):
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--fan-out", type=int, default=5)
+    parser.add_argument("--urls-per-sitemap", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds")
+    parser.add_argument("--words-per-page", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--max-depth", type=int, default=5)
+    parser.add_argument(
+        "--offload-workers",
+        type=int,
+        help="generate markdown in this many worker processes",
+    )
+    parser.add_argument("--sitemap-only", action="store_true")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH", help="baseline to compare to")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+
+
+def main(args) -> int:
+    options = {
+        "concurrency": args.concurrency,
+        "max_depth": args.max_depth,
+        "offload_workers": args.offload_workers,
+    }
+    site = SyntheticSite(
+        pages=args.pages,
+        fan_out=args.fan_out,
+        urls_per_sitemap=args.urls_per_sitemap,
+        latency=args.latency,
+        words_per_page=args.words_per_page,
+    )
+
+    # crawl_parallel appends to ./data/{filename}.md, keep that out of the cwd.
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="webchatai-crawl-bench-") as workdir:
+        os.makedirs(os.path.join(workdir, "data"))
+        os.chdir(workdir)
+        try:
+            with site:
+                results = [bench_url_utils(site), bench_sitemap(site)]
+                if not args.sitemap_only:
+                    results += asyncio.run(_bench_browser(site, options))
+        finally:
+            os.chdir(cwd)
+
+    print(format_table(results, COLUMNS))
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+    if args.compare:
+        regressions = compare_baseline(
+            results,
+            load_baseline(args.compare),
+            KEY_FIELDS,
+            HIGHER_IS_BETTER,
+            LOWER_IS_BETTER,
+            args.tolerance,
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
@@ -0,0 +1,292 @@
+"""Offline ingest/load/query benchmark for every ``IndexFactory`` backend.
+
+Runs against a synthetic corpus with the ``mock`` model (a mock LLM and
+deterministic hash embeddings) and, unless real servers are given, in-memory
+stand-ins for Redis (``fakeredis``) and MongoDB (``mongomock``), so no API
+keys or services are needed. With ``--quantization`` the disk backend also
+reports recall against exact search and the vector memory saved.
+"""
+
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from webchatai.agent.benchmarks.utils import (
+    compare_baseline,
+    format_table,
+    latency_summary,
+    load_baseline,
+    peak_rss_mb,
+    save_baseline,
+)
+
+BACKENDS = ("redis", "mongodb", "chroma", "disk")
+KEY_FIELDS = ["backend", "docs"]
+HIGHER_IS_BETTER = ["docs_per_sec", "recall_at_10"]
+LOWER_IS_BETTER = ["load_ms", "query_p50_ms", "query_p95_ms", "query_p99_ms"]
+COLUMNS = KEY_FIELDS + ["docs_per_sec", "load_ms"]
+COLUMNS += ["query_p50_ms", "query_p95_ms", "query_p99_ms", "peak_rss_mb"]
+QUANTIZATION_COLUMNS = ["recall_at_10", "quantized_ms_per_query"]
+QUANTIZATION_COLUMNS += ["exact_ms_per_query", "compression"]
+
+_TOPICS = ["pricing", "billing", "support", "shipping", "returns", "security"]
+_TOPICS += ["account", "api", "integrations", "privacy", "onboarding", "teams"]
+
+
+def generate_corpus(directory: str, num_docs: int, words_per_doc: int, seed: int):
+    """Write ``num_docs`` markdown pages and return (file paths, queries)."""
+    rng = random.Random(seed)
+    vocabulary = [
+        "".join(
+            rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9))
+        )
+        for _ in range(5000)
+    ]
+    os.makedirs(directory, exist_ok=True)
+
+    files, queries = [], []
+    for doc in range(num_docs):
+        topic = _TOPICS[doc % len(_TOPICS)]
+        sentences = []
+        words = 0
+        while words < words_per_doc:
+            length = rng.randint(8, 20)
+            sentence = " ".join(rng.choice(vocabulary) for _ in range(length))
+            sentences.append(f"{topic.capitalize()} {sentence}.")
+            words += length + 1
+
+        path = os.path.join(directory, f"page_{doc:06d}.md")
+        with open(path, "w") as f:
+            f.write(f"# {topic.title()} page {doc}\n\n")
+            f.write(" ".join(sentences))
+        files.append(path)
+        queries.append(f"What does the {topic} page say about {sentences[0][:60]}?")
+    return files, queries
+
+
+def create_store(backend: str, namespace: str, options: dict, shared: dict):
+    from webchatai.agent.chat.storage import StoreManager
+
+    if backend == "redis":
+        if options.get("redis_url"):
+            return StoreManager.create(
+                "redis",
+                host=None,
+                port=None,
+                namespace=namespace,
+                uri=options["redis_url"],
+            )
+        try:
+            import fakeredis
+        except ImportError:
+            raise ImportError("The redis benchmark needs `pip install fakeredis`")
+        server = shared.setdefault("redis_server", fakeredis.FakeServer())
+        return StoreManager.create(
+            "redis",
+            host=None,
+            port=None,
+            namespace=namespace,
+            client=fakeredis.FakeRedis(server=server),
+            async_client=fakeredis.FakeAsyncRedis(server=server),
+        )
+
+    if backend == "mongodb":
+        if options.get("mongo_uri"):
+            return StoreManager.create(
+                "mongodb",
+                host=None,
+                port=None,
+                namespace=namespace,
+                uri=options["mongo_uri"],
+            )
+        try:
+            import mongomock
+        except ImportError:
+            raise ImportError("The mongodb benchmark needs `pip install mongomock`")
+        client = shared.setdefault("mongo_client", mongomock.MongoClient())
+        return StoreManager.create(
+            "mongodb", host=None, port=None, namespace=namespace, client=client
+        )
+
+    if backend == "chroma":
+        if "chroma_store" not in shared:
+            shared["chroma_store"] = StoreManager.create(
+                "chromadb", collection_name=namespace, config=None
+            )
+        return shared["chroma_store"]
+
+    return None
+
+
+def _create_index(backend, store, document_handler, config):
+    from webchatai.agent.chat.index import IndexManager
+
+    return IndexManager.create(
+        store_type=backend,
+        storage_manager=store,
+        document_handler=document_handler,
+        config=config,
+    )
+
+
+def run_backend(backend: str, num_docs: int, options: dict) -> dict:
+    """Ingest, reload and query one backend. Meant to run in its own process."""
+    # Indexes persist to ./storage, so run inside a directory that is removed
+    # with everything written to it afterwards.
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=f"webchatai-bench-{backend}-") as workdir:
+        os.chdir(workdir)
+        try:
+            return _run_backend(backend, num_docs, options, workdir)
+        finally:
+            os.chdir(cwd)
+
+
+def _run_backend(backend: str, num_docs: int, options: dict, workdir: str) -> dict:
+    from webchatai.agent.chat.config import Config
+    from webchatai.agent.chat.llm import LLMManager
+    from webchatai.agent.chat.manager import DocumentHandler
+
+    files, queries = generate_corpus(
+        os.path.join(workdir, "corpus"),
+        num_docs,
+        options["words_per_doc"],
+        options["seed"],
+    )
+    namespace = f"bench_{backend}_{num_docs}"
+    key_name = "bench"
+    config = Config(
+        file_path=files,
+        llm_api_key=None,
+        namespace=namespace,
+        model=None,
+        host=None,
+        port=None,
+        model_type="mock",
+        store_type=backend,
+        vector_quantization=options["quantization"],
+    )
+    LLMManager.create(
+        model_type="mock",
+        chunk_size=options["chunk_size"],
+        embedding_dim=options["embedding_dim"],
+    )
+    document_handler = DocumentHandler(files)
+    shared = {}
+
+    index_manager = _create_index(
+        backend,
+        create_store(backend, namespace, options, shared),
+        document_handler,
+        config,
+    )
+    start = time.perf_counter()
+    index_manager.create_index(key_name)
+    ingest_s = time.perf_counter() - start
+
+    index_manager = _create_index(
+        backend,
+        create_store(backend, namespace, options, shared),
+        document_handler,
+        config,
+    )
+    start = time.perf_counter()
+    index = index_manager.load_index(key_name)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    query_engine = index.as_query_engine()
+    latencies = []
+    for query in queries[: options["queries"]]:
+        start = time.perf_counter()
+        query_engine.query(query)
+        latencies.append(time.perf_counter() - start)
+
+    quantization = {}
+    if options["quantization"] and backend == "disk":
+        from llama_index.core import Settings
+
+        embeddings = Settings.embed_model.get_text_embedding_batch(
+            queries[: options["queries"]]
+        )
+        quantization = index.vector_store.evaluate(embeddings, similarity_top_k=10)
+        backend = f"{backend}+{quantization.pop('mode')}"
+
+    return {
+        "backend": backend,
+        "docs": num_docs,
+        "ingest_s": ingest_s,
+        "docs_per_sec": num_docs / ingest_s,
+        "load_ms": load_ms,
+        **latency_summary(latencies, "query"),
+        "peak_rss_mb": peak_rss_mb(),
+        **quantization,
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--sizes", default="100,1000")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--words-per-doc", type=int, default=400)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--embedding-dim", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--quantization",
+        choices=["int8", "binary"],
+        help="quantize the disk backend's vectors and report recall",
+    )
+    parser.add_argument("--redis-url", help="benchmark a real Redis instead")
+    parser.add_argument("--mongo-uri", help="benchmark a real MongoDB instead")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH", help="baseline to compare to")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+
+
+def main(args) -> int:
+    options = {
+        "queries": args.queries,
+        "words_per_doc": args.words_per_doc,
+        "chunk_size": args.chunk_size,
+        "embedding_dim": args.embedding_dim,
+        "seed": args.seed,
+        "redis_url": args.redis_url,
+        "mongo_uri": args.mongo_uri,
+        "quantization": args.quantization,
+    }
+    backends = [backend.strip() for backend in args.backends.split(",")]
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    # Every run gets a fresh process so peak RSS is per backend and size.
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend in backends:
+        for size in sizes:
+            print(f"Benchmarking {backend} with {size} documents...", flush=True)
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results.append(
+                    pool.submit(run_backend, backend, size, options).result()
+                )
+
+    columns = COLUMNS + (QUANTIZATION_COLUMNS if args.quantization else [])
+    print(format_table(results, columns))
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+    if args.compare:
+        regressions = compare_baseline(
+            results,
+            load_baseline(args.compare),
+            KEY_FIELDS,
+            HIGHER_IS_BETTER,
+            LOWER_IS_BETTER,
+            args.tolerance,
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
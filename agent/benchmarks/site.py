@@ -0,0 +1,175 @@
+import gzip
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+class SyntheticSite:
+    """A generated website served from a background thread on localhost.
+
+    Pages link to ``fan_out`` other pages. They are listed in a sitemap index
+    that points at nested sitemap indexes and then at url sets, and every
+    other one of those is gzipped. ``robots.txt`` disallows ``/private/``,
+    and each response is delayed by ``latency`` seconds.
+    """
+
+    def __init__(
+        self,
+        pages: int = 200,
+        fan_out: int = 5,
+        urls_per_sitemap: int = 50,
+        latency: float = 0.0,
+        words_per_page: int = 300,
+        seed: int = 0,
+    ):
+        self.pages = pages
+        self.fan_out = fan_out
+        self.urls_per_sitemap = urls_per_sitemap
+        self.latency = latency
+        self.words_per_page = words_per_page
+        self.rng = random.Random(seed)
+        self.vocabulary = [
+            "".join(self.rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(6))
+            for _ in range(2000)
+        ]
+        self.requests = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page_links(self, page: int):
+        return [(page * self.fan_out + i + 1) % self.pages for i in range(self.fan_out)]
+
+    def render_page(self, page: int) -> bytes:
+        rng = random.Random(page)
+        paragraphs = []
+        for _ in range(max(1, self.words_per_page // 60)):
+            words = " ".join(rng.choice(self.vocabulary) for _ in range(60))
+            paragraphs.append(f"<p>{words}.</p>")
+        links = "".join(
+            f'<li><a href="/page/{link}">Page {link}</a></li>'
+            for link in self.page_links(page)
+        )
+        html = (
+            f"<html><head><title>Page {page}</title></head><body>"
+            f"<nav><ul>{links}</ul></nav><main><h1>Page {page}</h1>"
+            f"{''.join(paragraphs)}</main>"
+            f'<footer><a href="/private/{page}">private</a></footer></body></html>'
+        )
+        return html.encode()
+
+    def sitemap_chunks(self):
+        return [
+            range(start, min(start + self.urls_per_sitemap, self.pages))
+            for start in range(0, self.pages, self.urls_per_sitemap)
+        ]
+
+    def sitemap_name(self, chunk: int) -> str:
+        return f"urls-{chunk}.xml.gz" if chunk % 2 else f"urls-{chunk}.xml"
+
+    def render_sitemap(self, path: str):
+        base = self.base_url
+        chunks = self.sitemap_chunks()
+        half = (len(chunks) + 1) // 2
+        if path == "/sitemap.xml":
+            # The root index only points at the two nested indexes.
+            return self._sitemap_index(
+                [f"{base}/sitemaps/index-0.xml", f"{base}/sitemaps/index-1.xml.gz"]
+            )
+        if path.startswith("/sitemaps/index-"):
+            selected = range(0, half) if "index-0" in path else range(half, len(chunks))
+            return self._sitemap_index(
+                f"{base}/sitemaps/{self.sitemap_name(chunk)}" for chunk in selected
+            )
+        if path.startswith("/sitemaps/urls-"):
+            chunk = int(path.split("-")[1].split(".")[0])
+            if chunk < len(chunks):
+                return self._urlset(f"{base}/page/{page}" for page in chunks[chunk])
+        return None
+
+    @staticmethod
+    def _sitemap_index(locations) -> bytes:
+        entries = "".join(f"<sitemap><loc>{loc}</loc></sitemap>" for loc in locations)
+        return (
+            f'<?xml version="1.0" encoding="UTF-8"?>'
+            f'<sitemapindex xmlns="{SITEMAP_NS}">{entries}</sitemapindex>'
+        ).encode()
+
+    @staticmethod
+    def _urlset(locations) -> bytes:
+        entries = "".join(f"<url><loc>{loc}</loc></url>" for loc in locations)
+        return (
+            f'<?xml version="1.0" encoding="UTF-8"?>'
+            f'<urlset xmlns="{SITEMAP_NS}">{entries}</urlset>'
+        ).encode()
+
+    def handle(self, path: str):
+        """Return (status, content type, body) for ``path``."""
+        path = path.split("?", 1)[0].split("#", 1)[0]
+        if path == "/robots.txt":
+            body = (
+                "User-agent: *\n"
+                "Disallow: /private/\n"
+                f"Sitemap: {self.base_url}/sitemap.xml\n"
+            )
+            return 200, "text/plain", body.encode()
+        if path == "/sitemap.xml" or path.startswith("/sitemaps/"):
+            body = self.render_sitemap(path)
+            if body is None:
+                return 404, "text/plain", b"not found"
+            if path.endswith(".gz"):
+                return 200, "application/gzip", gzip.compress(body)
+            return 200, "application/xml", body
+        if path in ("/", ""):
+            return 200, "text/html", self.render_page(0)
+        if path.startswith("/page/"):
+            try:
+                page = int(path.rstrip("/").rsplit("/", 1)[1])
+            except ValueError:
+                page = -1
+            if 0 <= page < self.pages:
+                return 200, "text/html", self.render_page(page)
+        return 404, "text/plain", b"not found"
+
+    def start(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests += 1
+                if site.latency:
+                    time.sleep(site.latency)
+                status, content_type, body = site.handle(self.path)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
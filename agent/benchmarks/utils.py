@@ -0,0 +1,95 @@
+import json
+import math
+import os
+import resource
+import sys
+from typing import Dict, List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of ``samples``, ``pct`` in [0, 100]."""
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    if low == high:
+        return ordered[low]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def latency_summary(samples: List[float], prefix: str) -> Dict[str, float]:
+    return {
+        f"{prefix}_p50_ms": percentile(samples, 50) * 1000,
+        f"{prefix}_p95_ms": percentile(samples, 95) * 1000,
+        f"{prefix}_p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere.
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def save_baseline(path: str, results: List[dict]):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(results, file, indent=4)
+
+
+def load_baseline(path: str) -> List[dict]:
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def compare_baseline(
+    results: List[dict],
+    baseline: List[dict],
+    key_fields: List[str],
+    higher_is_better: List[str],
+    lower_is_better: List[str],
+    tolerance: float,
+) -> List[str]:
+    """Return a description of every metric that regressed beyond ``tolerance``."""
+    previous = {tuple(row[field] for field in key_fields): row for row in baseline}
+    regressions = []
+    for row in results:
+        key = tuple(row[field] for field in key_fields)
+        old = previous.get(key)
+        if old is None:
+            continue
+        for metric in higher_is_better + lower_is_better:
+            before, after = old.get(metric), row.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if metric in higher_is_better:
+                change = -change
+            if change > tolerance:
+                regressions.append(
+                    f"{'/'.join(map(str, key))} {metric}: "
+                    f"{before:.3f} -> {after:.3f} ({change:+.0%} worse)"
+                )
+    return regressions
+
+
+def format_table(rows: List[dict], columns: List[str]) -> str:
+    def cell(value):
+        if isinstance(value, float):
+            return f"{value:.2f}"
+        return str(value)
+
+    widths = [
+        max(len(column), *(len(cell(row.get(column, ""))) for row in rows))
+        for column in columns
+    ]
+    lines = ["  ".join(c.rjust(w) for c, w in zip(columns, widths))]
+    for row in rows:
+        lines.append(
+            "  ".join(cell(row.get(c, "")).rjust(w) for c, w in zip(columns, widths))
+        )
+    return "\n".join(lines)
@@ -3,4 +3,4 @@ from webchatai.agent.chat.logger import Logger
 from webchatai.agent.chat.parsing import DocumentHandler
 from webchatai.agent.chat.parsing import DocumentHandler
 from webchatai.agent.chat.storage import StoreManager
-from webchatai.agent.chat.manager import LLMManager, RAGAgent
+from webchatai.agent.chat.manager import BatchAnswer, LLMManager, RAGAgent
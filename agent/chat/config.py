@@ -12,6 +12,13 @@ class Config:
         model_type="openai",
         store_type="redis",
         persist_disk=False,
+        store_batch_size=100,
+        store_max_connections=None,
+        metrics_exporter=None,
+        index_workers=None,
+        keep_sharded=False,
+        vector_quantization=None,
+        rescore_factor=None,
     ):
         self.URI = uri
         self.STORE_HOST = host
@@ -26,3 +33,21 @@ class Config:
         self.MODEL_TYPE = model_type
         self.persist_disk = persist_disk
         self.store_type = store_type
+        self.STORE_BATCH_SIZE = store_batch_size
+        self.STORE_MAX_CONNECTIONS = store_max_connections
+        self.METRICS_EXPORTER = metrics_exporter
+        self.INDEX_WORKERS = index_workers
+        self.KEEP_SHARDED = keep_sharded
+        self.VECTOR_QUANTIZATION = vector_quantization
+        self.RESCORE_FACTOR = rescore_factor
+
+    def llm_kwargs(self):
+        return dict(
+            model_type=self.MODEL_TYPE,
+            api_key=self.OPENAI_API_KEY,
+            model=self.MODEL,
+            temperature=self.TEMPERATURE,
+            chunk_size=self.CHUNK_SIZE,
+            embedding_model=self.EMBEDDING_MODEL,
+            cache_folder="./store/",
+        )
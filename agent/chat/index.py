@@ -1,19 +1,218 @@
-import os
+import contextvars
+import heapq
+import itertools
 import json
+import logging
+import multiprocessing
 from abc import ABC, abstractmethod
-from typing import Type, Dict
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Type, Dict, List
 
+import numpy as np
 from llama_index.core import (
+    Settings,
+    SimpleDirectoryReader,
     SummaryIndex,
     load_index_from_storage,
     StorageContext,
     VectorStoreIndex,
 )
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.constants import DEFAULT_SIMILARITY_TOP_K
+from llama_index.core.data_structs import IndexList
+from llama_index.core.indices.utils import embed_nodes
+from llama_index.core.ingestion import run_transformations
 from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.schema import NodeWithScore
+from llama_index.core.vector_stores import SimpleVectorStore
+from llama_index.core.vector_stores.types import VectorStoreQueryResult
 
 from webchatai.agent.chat import Config
+from webchatai.agent.chat.llm import LLMManager
+from webchatai.agent.chat.quantization import QuantizedVectorStore
+from webchatai.agent.chat.registry import FileIndexRegistry
 from webchatai.agent.chat.storage import StoreManager
 
+logger = logging.getLogger(__name__)
+
+# Input files handed to a build worker per task; small tasks keep the memory
+# of every worker bounded regardless of the size of the site. The parent
+# still holds the merged index.
+SHARD_TASK_FILES = 16
+SHARD_SEPARATOR = ","
+# Marks a registered index id as the ids of a sharded build, so a build with
+# a single shard is still recognised.
+SHARD_PREFIX = "shards:"
+# Queries scored together in batched retrieval; bounds the score matrix to
+# this many rows times the number of stored vectors.
+RETRIEVE_BATCH_QUERIES = 256
+
+
+def _map_in_context(executor, fn, items):
+    # Pool threads do not inherit context variables such as the metric tags;
+    # run every call in a copy of the caller's context.
+    futures = [
+        executor.submit(contextvars.copy_context().run, fn, item) for item in items
+    ]
+    return [future.result() for future in futures]
+
+
+def _init_shard_worker(llm_kwargs):
+    LLMManager.create(**llm_kwargs)
+
+
+def _build_shard_nodes(input_files: List[str], embed: bool):
+    documents = SimpleDirectoryReader(input_files=input_files).load_data()
+    if not embed:
+        return SentenceSplitter().get_nodes_from_documents(documents)
+
+    nodes = run_transformations(documents, Settings.transformations)
+    embeddings = embed_nodes(nodes, Settings.embed_model)
+    for node in nodes:
+        node.embedding = embeddings[node.node_id]
+    return nodes
+
+
+class ShardedRetriever(BaseRetriever):
+    """Queries every shard in parallel and keeps the overall top k."""
+
+    def __init__(self, retrievers, similarity_top_k: int, executor):
+        super().__init__()
+        self.retrievers = retrievers
+        self.similarity_top_k = similarity_top_k
+        self.executor = executor
+
+    def _retrieve(self, query_bundle):
+        # Embed once instead of once per shard.
+        if query_bundle.embedding is None and query_bundle.embedding_strs:
+            query_bundle.embedding = (
+                Settings.embed_model.get_agg_embedding_from_queries(
+                    query_bundle.embedding_strs
+                )
+            )
+        results = _map_in_context(
+            self.executor,
+            lambda retriever: retriever.retrieve(query_bundle),
+            self.retrievers,
+        )
+        return heapq.nlargest(
+            self.similarity_top_k,
+            itertools.chain.from_iterable(results),
+            key=lambda node: node.score or 0.0,
+        )
+
+
+class ShardedIndex:
+    """Read-only view over vector index shards with scatter-gather retrieval."""
+
+    def __init__(self, shards):
+        self.shards = shards
+        self.index_id = SHARD_PREFIX + SHARD_SEPARATOR.join(
+            shard.index_id for shard in shards
+        )
+        self.executor = ThreadPoolExecutor(max_workers=len(shards))
+
+    def as_retriever(self, similarity_top_k: int = DEFAULT_SIMILARITY_TOP_K, **kwargs):
+        # llama_index fails on a query against an empty vector index.
+        retrievers = [
+            shard.as_retriever(similarity_top_k=similarity_top_k, **kwargs)
+            for shard in self.shards
+            if shard.index_struct.nodes_dict
+        ]
+        return ShardedRetriever(retrievers, similarity_top_k, self.executor)
+
+    def as_query_engine(
+        self, similarity_top_k: int = DEFAULT_SIMILARITY_TOP_K, **kwargs
+    ):
+        return RetrieverQueryEngine.from_args(
+            self.as_retriever(similarity_top_k=similarity_top_k), **kwargs
+        )
+
+
+def _query_many(vector_store, embeddings, similarity_top_k: int):
+    if hasattr(vector_store, "query_many"):
+        return vector_store.query_many(embeddings, similarity_top_k)
+    if not isinstance(vector_store, SimpleVectorStore):
+        return None
+
+    # Same cosine ranking as SimpleVectorStore.query, as one matrix product.
+    embedding_dict = vector_store.data.embedding_dict
+    ids = list(embedding_dict)
+    if not ids:
+        return [VectorStoreQueryResult(ids=[], similarities=[]) for _ in embeddings]
+    matrix = np.asarray([embedding_dict[i] for i in ids], dtype=np.float32)
+    queries = np.asarray(embeddings, dtype=np.float32)
+    norms = np.outer(np.linalg.norm(queries, axis=1), np.linalg.norm(matrix, axis=1))
+    scores = (queries @ matrix.T) / np.where(norms == 0, 1.0, norms)
+
+    top_k = min(similarity_top_k, len(ids))
+    results = []
+    for row in scores:
+        top = np.argpartition(-row, top_k - 1)[:top_k]
+        top = top[np.argsort(-row[top])]
+        results.append(
+            VectorStoreQueryResult(
+                ids=[ids[i] for i in top], similarities=row[top].tolist()
+            )
+        )
+    return results
+
+
+def retrieve_batch(index, query_bundles, similarity_top_k: int, executor=None):
+    """Retrieve nodes for many embedded queries at once.
+
+    Vector indexes on a local store answer the whole batch in one vectorized
+    pass; other indexes are queried one bundle at a time, on ``executor`` if
+    given.
+    """
+    if isinstance(index, ShardedIndex):
+        per_shard = [
+            retrieve_batch(shard, query_bundles, similarity_top_k, executor)
+            for shard in index.shards
+        ]
+        return [
+            heapq.nlargest(
+                similarity_top_k,
+                itertools.chain.from_iterable(shard_nodes),
+                key=lambda node: node.score or 0.0,
+            )
+            for shard_nodes in zip(*per_shard)
+        ]
+
+    results = None
+    if isinstance(index, VectorStoreIndex):
+        embeddings = [bundle.embedding for bundle in query_bundles]
+        for start in range(0, len(embeddings), RETRIEVE_BATCH_QUERIES):
+            chunk = _query_many(
+                index.vector_store,
+                embeddings[start : start + RETRIEVE_BATCH_QUERIES],
+                similarity_top_k,
+            )
+            if chunk is None:
+                break
+            results = (results or []) + chunk
+    if results is not None:
+        return [
+            [
+                NodeWithScore(node=node, score=score)
+                for node, score in zip(
+                    index.docstore.get_nodes(result.ids), result.similarities
+                )
+            ]
+            for result in results
+        ]
+
+    retriever = index.as_retriever(similarity_top_k=similarity_top_k)
+    if executor is None:
+        return [retriever.retrieve(bundle) for bundle in query_bundles]
+    return _map_in_context(executor, retriever.retrieve, query_bundles)
+
 
 class IndexBase(ABC):
     @abstractmethod
@@ -43,63 +242,106 @@ class IndexManager:
 
 
 class Index(IndexBase):
-    @classmethod
-    def store_index_id(self, file_path, index):
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, "r") as file:
-                    data = json.load(file)
-            except json.JSONDecodeError:
-                data = {}
-        else:
-            data = {}
-
-        data.update(index)
-
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "w") as file:
-            json.dump(data, file, indent=4)
+    store_name: str = None
+
+    def get_registry(self):
+        registry = None
+        get_registry = getattr(self.storage_manager, "get_registry", None)
+        if get_registry is not None:
+            registry = get_registry()
+        if registry is None:
+            registry = FileIndexRegistry(
+                f"./storage/{self.store_name}_index_registry.json"
+            )
+        return registry
+
+    def store_index_id(self, key_name: str, index_id: str):
+        self.registry.set(key_name, index_id)
+
+    def load_index_id(self, key_name: str):
+        index_id = self.registry.get(key_name)
+        if index_id is None:
+            index_id = self._load_legacy_index_id(key_name)
+        if index_id is None:
+            logger.error("The key '%s' is not registered.", key_name)
+        return index_id
+
+    def build_node_batches(self, embed: bool):
+        """Parse (and embed) the input files in worker processes.
+
+        Yields node batches as workers finish them, with at most two tasks
+        per worker in flight so finished batches never pile up. Only the
+        workers' memory is bounded this way; the caller keeps what it merges.
+        """
+        workers = self.config.INDEX_WORKERS
+        files = list(self.config.INPUT_FILES)
+        tasks = (
+            files[start : start + SHARD_TASK_FILES]
+            for start in range(0, len(files), SHARD_TASK_FILES)
+        )
 
-    @classmethod
-    def load_index_id(self, file_path, key_name: str):
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_shard_worker,
+            initargs=(self.config.llm_kwargs(),),
+        ) as pool:
+            pending = {
+                pool.submit(_build_shard_nodes, task, embed)
+                for task in itertools.islice(tasks, 2 * workers)
+            }
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = next(tasks, None)
+                    if task is not None:
+                        pending.add(pool.submit(_build_shard_nodes, task, embed))
+                    yield future.result()
+
+    def _load_legacy_index_id(self, key_name: str):
+        # Index ids used to be kept in one JSON file per key; migrate them
+        # into the registry the first time they are looked up.
+        file_path = f"./storage/{key_name}/{self.store_name}_index_id.json"
         try:
             with open(file_path, "r") as file:
-                data = json.load(file)
-            index_id = data.get(key_name)
-            if index_id is None:
-                print(f"Error: The key '{key_name}' does not exist in {file_path}.")
-            return index_id
-        except FileNotFoundError:
-            print(f"Error: The file at {file_path} does not exist.")
+                index_id = json.load(file).get(key_name)
+        except (FileNotFoundError, json.JSONDecodeError):
             return None
+        if index_id is not None:
+            self.store_index_id(key_name, index_id)
+        return index_id
 
 
 @IndexFactory.register("chroma")
 class ChromaIndex(Index):
+    store_name = "chroma"
+
     def __init__(self, storage_manager, document_handler, config):
         self.storage_manager = storage_manager
         self.document_handler = document_handler
         self.index = None
         self.config = config
         self.parser = SentenceSplitter()
+        self.registry = self.get_registry()
         self.storage_context = storage_manager.get_storage_context()
 
     def create_index(self, key_name: str):
-        documents = self.document_handler.get_documents()
-        index = VectorStoreIndex.from_documents(
-            documents, storage_context=self.storage_context
-        )
+        if self.config.INDEX_WORKERS:
+            index = VectorStoreIndex(nodes=[], storage_context=self.storage_context)
+            for nodes in self.build_node_batches(embed=True):
+                index.insert_nodes(nodes)
+        else:
+            documents = self.document_handler.get_documents()
+            index = VectorStoreIndex.from_documents(
+                documents, storage_context=self.storage_context
+            )
         self.index = index
 
-        file_path = f"./storage/{key_name}/chroma_index_id.json"
-        data = {key_name: self.index.index_id}
-        self.store_index_id(file_path, data)
+        self.store_index_id(key_name, self.index.index_id)
 
     def load_index(self, key_name):
         vector_store = self.storage_manager.get_vector_store()
-        print(vector_store, "vector_store")
         index = VectorStoreIndex.from_vector_store(vector_store)
-        print(index, "index")
 
         self.index = index
         return self.index
@@ -107,57 +349,134 @@ class ChromaIndex(Index):
 
 @IndexFactory.register("disk")
 class DiskIndex(Index):
+    store_name = "disk"
+
     def __init__(self, storage_manager, document_handler, config):
         self.storage_manager = storage_manager
         self.document_handler = document_handler
         self.index = None
         self.config = config
         self.parser = SentenceSplitter()
-        self.storage_context = StorageContext.from_defaults()
-
-    def create_index(self, key_name: str):
-        documents = self.document_handler.get_documents()
-        index = VectorStoreIndex.from_documents(
-            documents, storage_context=self.storage_context
+        self.registry = self.get_registry()
+        self.storage_context = None
+
+    def new_storage_context(self):
+        if not self.config.VECTOR_QUANTIZATION:
+            return StorageContext.from_defaults()
+        return StorageContext.from_defaults(
+            vector_store=QuantizedVectorStore(
+                mode=self.config.VECTOR_QUANTIZATION,
+                rescore_factor=self.config.RESCORE_FACTOR,
+            )
         )
-        self.storage_context.persist(persist_dir=f"./storage/{key_name}")
-        self.index = index
 
-        file_path = f"./storage/{key_name}/disk_index_id.json"
-        data = {key_name: self.index.index_id}
-        self.store_index_id(file_path, data)
+    @staticmethod
+    def load_storage_context(persist_dir: str):
+        # Quantized indexes are detected from what was persisted, so they
+        # load regardless of the current quantization setting.
+        if QuantizedVectorStore.is_persisted(persist_dir):
+            return StorageContext.from_defaults(
+                persist_dir=persist_dir,
+                vector_store=QuantizedVectorStore.from_persist_dir(persist_dir),
+            )
+        return StorageContext.from_defaults(persist_dir=persist_dir)
+
+    def create_index(self, key_name: str):
+        if self.config.INDEX_WORKERS and self.config.KEEP_SHARDED:
+            self.index = self._create_sharded_index(key_name)
+        elif self.config.INDEX_WORKERS:
+            self.storage_context = self.new_storage_context()
+            index = VectorStoreIndex(nodes=[], storage_context=self.storage_context)
+            for nodes in self.build_node_batches(embed=True):
+                index.insert_nodes(nodes)
+            self.storage_context.persist(persist_dir=f"./storage/{key_name}")
+            self.index = index
+        else:
+            self.storage_context = self.new_storage_context()
+            documents = self.document_handler.get_documents()
+            index = VectorStoreIndex.from_documents(
+                documents, storage_context=self.storage_context
+            )
+            self.storage_context.persist(persist_dir=f"./storage/{key_name}")
+            self.index = index
+
+        self.store_index_id(key_name, self.index.index_id)
+
+    def _create_sharded_index(self, key_name: str):
+        # Every shard gets its own storage so it can be loaded and searched
+        # independently of the others.
+        shards = [
+            VectorStoreIndex(nodes=[], storage_context=self.new_storage_context())
+            for _ in range(self.config.INDEX_WORKERS)
+        ]
+        batches = self.build_node_batches(embed=True)
+        for shard, nodes in zip(itertools.cycle(shards), batches):
+            shard.insert_nodes(nodes)
+        # With fewer file tasks than workers some shards get no nodes.
+        non_empty = [shard for shard in shards if shard.index_struct.nodes_dict]
+        shards = non_empty or shards[:1]
+        for number, shard in enumerate(shards):
+            shard.storage_context.persist(
+                persist_dir=f"./storage/{key_name}/shard-{number}"
+            )
+        return ShardedIndex(shards)
 
     def load_index(self, key_name):
-
-        self.storage_context = StorageContext.from_defaults(
-            persist_dir=f"./storage/{key_name}"
-        )
-        self.index = load_index_from_storage(self.storage_context)
+        index_id = self.load_index_id(key_name)
+        if index_id and index_id.startswith(SHARD_PREFIX):
+            shard_ids = index_id[len(SHARD_PREFIX) :].split(SHARD_SEPARATOR)
+            shards = []
+            for number, shard_id in enumerate(shard_ids):
+                storage_context = self.load_storage_context(
+                    f"./storage/{key_name}/shard-{number}"
+                )
+                shards.append(
+                    load_index_from_storage(storage_context, index_id=shard_id)
+                )
+            self.index = ShardedIndex(shards)
+            return self.index
+
+        self.storage_context = self.load_storage_context(f"./storage/{key_name}")
+        self.index = load_index_from_storage(self.storage_context, index_id=index_id)
         return self.index
 
 
 @IndexFactory.register("redis")
+@IndexFactory.register("mongodb")
 class RedisIndex(Index):
+    store_name = "redis"
+
     def __init__(self, storage_manager, document_handler, config):
         self.storage_manager = storage_manager
         self.document_handler = document_handler
         self.index = None
         self.config = config
         self.parser = SentenceSplitter()
+        self.registry = self.get_registry()
         self.storage_context = self.storage_manager.get_storage_context()
 
     def create_index(self, key_name: str):
-        nodes = self.document_handler.get_nodes()
-        summary_index = SummaryIndex(nodes, storage_context=self.storage_context)
+        if self.config.INDEX_WORKERS:
+            # insert_nodes would rewrite the whole node list to the index
+            # store per batch; write the nodes batch by batch and the list once.
+            docstore = self.storage_context.docstore
+            index_struct = IndexList()
+            for nodes in self.build_node_batches(embed=False):
+                docstore.add_documents(nodes, batch_size=self.config.STORE_BATCH_SIZE)
+                for node in nodes:
+                    index_struct.add_node(node)
+            summary_index = SummaryIndex(
+                index_struct=index_struct, storage_context=self.storage_context
+            )
+        else:
+            nodes = self.document_handler.get_nodes()
+            summary_index = SummaryIndex(nodes, storage_context=self.storage_context)
         self.index = summary_index
 
-        file_path = f"./storage/{key_name}/redis_index_id.json"
-        data = {key_name: self.index.index_id}
-        self.store_index_id(file_path, data)
+        self.store_index_id(key_name, self.index.index_id)
 
     def load_index(self, key_name):
-        file_path = f"./storage/{key_name}/redis_index_id.json"
-        index_id = self.load_index_id(file_path, key_name)
+        index_id = self.load_index_id(key_name)
         if index_id:
             self.index = load_index_from_storage(
                 storage_context=self.storage_context, index_id=index_id
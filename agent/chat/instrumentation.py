@@ -0,0 +1,116 @@
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from llama_index.core import Settings
+from llama_index.core.callbacks import CBEventType, EventPayload
+from llama_index.core.callbacks.base_handler import BaseCallbackHandler
+
+from webchatai.agent.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+STAGES = {
+    CBEventType.NODE_PARSING: "chunking",
+    CBEventType.EMBEDDING: "embedding",
+    CBEventType.RETRIEVE: "retrieve",
+    CBEventType.LLM: "llm",
+    CBEventType.SYNTHESIZE: "synthesize",
+    CBEventType.QUERY: "query",
+}
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Turns llama_index callback events into ``Metrics`` timings and counters."""
+
+    def __init__(self):
+        ignored = [event for event in CBEventType if event not in STAGES]
+        super().__init__(event_starts_to_ignore=ignored, event_ends_to_ignore=ignored)
+        self._starts: Dict[str, float] = {}
+
+    def on_event_start(
+        self,
+        event_type: CBEventType,
+        payload: Optional[Dict[str, Any]] = None,
+        event_id: str = "",
+        parent_id: str = "",
+        **kwargs: Any,
+    ) -> str:
+        self._starts[event_id] = time.perf_counter()
+        return event_id
+
+    def on_event_end(
+        self,
+        event_type: CBEventType,
+        payload: Optional[Dict[str, Any]] = None,
+        event_id: str = "",
+        **kwargs: Any,
+    ) -> None:
+        start = self._starts.pop(event_id, None)
+        stage = STAGES.get(event_type)
+        if start is None or stage is None:
+            return
+
+        Metrics.observe(f"{stage}_seconds", time.perf_counter() - start)
+        payload = payload or {}
+        if event_type == CBEventType.EMBEDDING:
+            Metrics.increment(
+                "embedded_chunks", len(payload.get(EventPayload.CHUNKS) or [])
+            )
+        elif event_type == CBEventType.NODE_PARSING:
+            Metrics.increment("chunks", len(payload.get(EventPayload.NODES) or []))
+        elif event_type == CBEventType.LLM:
+            Metrics.increment("llm_calls")
+            response = payload.get(EventPayload.RESPONSE) or payload.get(
+                EventPayload.COMPLETION
+            )
+            prompt_tokens, completion_tokens = _token_usage(response)
+            if prompt_tokens:
+                Metrics.increment("llm_prompt_tokens", prompt_tokens)
+            if completion_tokens:
+                Metrics.increment("llm_completion_tokens", completion_tokens)
+
+    def start_trace(self, trace_id: Optional[str] = None) -> None:
+        pass
+
+    def end_trace(
+        self,
+        trace_id: Optional[str] = None,
+        trace_map: Optional[Dict[str, List[str]]] = None,
+    ) -> None:
+        pass
+
+
+def enable_metrics(exporter):
+    """Install the process-wide exporter and the llama_index callback handler.
+
+    There is one exporter per process: the first one installed is kept and
+    returned to later callers, and the handler is only added once.
+    """
+    if not Metrics.enabled():
+        Metrics.enable(exporter)
+    elif exporter is not Metrics.exporter() and not isinstance(exporter, str):
+        logger.warning(
+            "A metrics exporter is already installed, keeping %r", Metrics.exporter()
+        )
+
+    if not any(
+        isinstance(handler, MetricsCallbackHandler)
+        for handler in Settings.callback_manager.handlers
+    ):
+        Settings.callback_manager.add_handler(MetricsCallbackHandler())
+    return Metrics.exporter()
+
+
+def _token_usage(response):
+    raw = getattr(response, "raw", None)
+    if raw is None:
+        return None, None
+    usage = raw.get("usage") if isinstance(raw, dict) else getattr(raw, "usage", None)
+    if usage is None:
+        return None, None
+    if isinstance(usage, dict):
+        return usage.get("prompt_tokens"), usage.get("completion_tokens")
+    return getattr(usage, "prompt_tokens", None), getattr(
+        usage, "completion_tokens", None
+    )
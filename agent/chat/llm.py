@@ -1,8 +1,14 @@
-from typing import Type, Dict
+import hashlib
+import math
+import re
+from typing import Type, Dict, List
 
 
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 from llama_index.core import Settings
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.callbacks import CBEventType, EventPayload
+from llama_index.core.llms import MockLLM
 from llama_index.llms.ollama import Ollama
 from llama_index.llms.openai import OpenAI
 
@@ -69,3 +75,95 @@ class OpenSourceModel(LanguageModel):
 
         self.temperature = temperature
         self.model = None
+
+
+class HashEmbedding(BaseEmbedding):
+    """Deterministic bag-of-words embedding that needs no model download.
+
+    Every token is hashed to a signed bucket, so texts sharing words end up
+    close to each other and results are reproducible across processes.
+    """
+
+    embed_dim: int = 256
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HashEmbedding"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.embed_dim
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.embed_dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+
+@ModelFactory.register("mock")
+class MockModel(LanguageModel):
+    """Offline model for tests and benchmarks: a mock LLM and hash embeddings."""
+
+    def __init__(
+        self,
+        chunk_size: int = 1024,
+        embedding_dim: int = 256,
+        max_tokens: int = 64,
+        **kwargs,
+    ):
+        Settings.llm = MockLLM(max_tokens=max_tokens)
+        Settings.chunk_size = chunk_size
+        Settings.embed_model = HashEmbedding(embed_dim=embedding_dim)
+
+
+def _huggingface_query_embeddings(embed_model, queries: List[str]):
+    # HuggingFaceEmbedding has no public batched query method; run its
+    # encoder with the query prompt, batched and reported like
+    # get_text_embedding_batch does.
+    embeddings = []
+    for start in range(0, len(queries), embed_model.embed_batch_size):
+        batch = queries[start : start + embed_model.embed_batch_size]
+        with embed_model.callback_manager.event(
+            CBEventType.EMBEDDING,
+            payload={EventPayload.SERIALIZED: embed_model.to_dict()},
+        ) as event:
+            batch_embeddings = embed_model._embed(batch, prompt_name="query")
+            event.on_end(
+                payload={
+                    EventPayload.CHUNKS: batch,
+                    EventPayload.EMBEDDINGS: batch_embeddings,
+                }
+            )
+        embeddings.extend(batch_embeddings)
+    return embeddings
+
+
+def _text_embeddings(embed_model, queries: List[str]):
+    return embed_model.get_text_embedding_batch(queries)
+
+
+# Batched query embedding per embedding class name. Models listed with
+# _text_embeddings embed queries and texts identically.
+QUERY_BATCH_EMBEDDERS = {
+    "HuggingFaceEmbedding": _huggingface_query_embeddings,
+    "OpenAIEmbedding": _text_embeddings,
+    "HashEmbedding": _text_embeddings,
+}
+
+
+def embed_queries(queries: List[str]) -> List[List[float]]:
+    """Embed many queries with ``Settings.embed_model``, batched when possible."""
+    embed_model = Settings.embed_model
+    batch_embed = QUERY_BATCH_EMBEDDERS.get(embed_model.class_name())
+    if batch_embed is None:
+        return [embed_model.get_query_embedding(query) for query in queries]
+    return batch_embed(embed_model, queries)
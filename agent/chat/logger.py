@@ -6,4 +6,3 @@ class Logger:
     @staticmethod
     def setup():
         logging.basicConfig(stream=sys.stdout, level=logging.INFO)
-        logging.getLogger().addHandler(logging.StreamHandler(stream=sys.stdout))
@@ -1,8 +1,15 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 from llama_index.core import (
+    QueryBundle,
     SimpleDirectoryReader,
+    get_response_synthesizer,
 )
+from llama_index.core.constants import DEFAULT_SIMILARITY_TOP_K
 from llama_index.agent.openai import OpenAIAgent
 from llama_index.core.node_parser import SentenceSplitter
 from llama_index.core.tools import QueryEngineTool
@@ -10,8 +17,14 @@ from llama_index.core.tools.types import ToolMetadata
 from llama_index.core.agent import ReActAgent
 
 from webchatai.agent.chat import Config, StoreManager, Logger
-from webchatai.agent.chat.index import IndexManager
-from webchatai.agent.chat.llm import LLMManager
+from webchatai.agent.chat.index import IndexManager, retrieve_batch
+from webchatai.agent.chat.instrumentation import enable_metrics
+from webchatai.agent.chat.llm import LLMManager, embed_queries
+from webchatai.agent.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
 
 
 class DocumentHandler:
@@ -52,11 +65,47 @@ class AgentManager:
         # return self.query_engine.query(prompt)
 
 
+class BatchAnswer:
+    """Result of one prompt in ``RAGAgent.run_many``.
+
+    ``retrieve_seconds`` is this prompt's share of the batched embedding and
+    retrieval, ``answer_seconds`` the time of its own LLM call.
+    """
+
+    def __init__(
+        self,
+        prompt: str,
+        response=None,
+        error: Exception = None,
+        retrieve_seconds: float = 0.0,
+        answer_seconds: float = 0.0,
+    ):
+        self.prompt = prompt
+        self.response = response
+        self.error = error
+        self.retrieve_seconds = retrieve_seconds
+        self.answer_seconds = answer_seconds
+
+    @property
+    def seconds(self) -> float:
+        return self.retrieve_seconds + self.answer_seconds
+
+    def __repr__(self):
+        status = "error" if self.error is not None else "ok"
+        return f"BatchAnswer({self.prompt!r}, {status}, seconds={self.seconds:.3f})"
+
+
 class RAGAgent:
     def __init__(self, config: Config):
         Logger.setup()
         self.config = config
 
+        # Shared by every agent in the process; metrics are told apart by
+        # their namespace and key_name tags.
+        self.metrics_exporter = None
+        if config.METRICS_EXPORTER is not None:
+            self.metrics_exporter = enable_metrics(config.METRICS_EXPORTER)
+
         self.storage_manager = None
         self.storage_manager = StoreManager.create(
             store_type=self.config.store_type,
@@ -64,6 +113,8 @@ class RAGAgent:
             port=config.STORE_PORT,
             namespace=config.NAMESPACE,
             uri=config.URI,
+            batch_size=config.STORE_BATCH_SIZE,
+            max_connections=config.STORE_MAX_CONNECTIONS,
         )
 
         self.document_handler = DocumentHandler(self.config.INPUT_FILES)
@@ -74,29 +125,98 @@ class RAGAgent:
             config=self.config,
         )
 
-        self.llm_manager = LLMManager.create(
-            model_type=config.MODEL_TYPE,
-            api_key=config.OPENAI_API_KEY,
-            model=config.MODEL,
-            temperature=config.TEMPERATURE,
-            chunk_size=config.CHUNK_SIZE,
-            embedding_model=config.EMBEDDING_MODEL,
-            cache_folder="./store/",
-        )
+        self.llm_manager = LLMManager.create(**config.llm_kwargs())
 
         self.agent_manager = None
 
     def setup_agent(self, index):
         self.agent_manager = AgentManager(index, self.config.OPENAI_API_KEY)
 
+    def metric_tags(self, key_name: str):
+        return Metrics.tags(
+            namespace=self.config.NAMESPACE,
+            key_name=key_name,
+            backend=self.config.store_type,
+        )
+
     def create_index(self, key_name: str):
-        self.index_manager.create_index(key_name)
+        with self.metric_tags(key_name), Metrics.timer("index_build"):
+            self.index_manager.create_index(key_name)
 
-    async def run(self, prompt: str, key_name: str) -> str:
+    def list_indexes(self):
+        return self.index_manager.registry.list_keys()
+
+    def get_index(self, key_name: str):
         if self.index_manager.index:
-            index = self.index_manager.index
-        else:
-            index = self.index_manager.load_index(key_name)
+            return self.index_manager.index
+        with Metrics.timer("index_load"):
+            return self.index_manager.load_index(key_name)
 
-        self.setup_agent(index)
-        return await self.agent_manager.chat(prompt)
+    async def run(self, prompt: str, key_name: str) -> str:
+        with self.metric_tags(key_name):
+            index = self.get_index(key_name)
+
+            self.setup_agent(index)
+            with Metrics.timer("answer"):
+                return await self.agent_manager.chat(prompt)
+
+    async def run_many(
+        self,
+        prompts: List[str],
+        key_name: str,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        similarity_top_k: int = DEFAULT_SIMILARITY_TOP_K,
+    ) -> List[BatchAnswer]:
+        """Answer many prompts against one index.
+
+        Identical prompts are answered once. Prompts are embedded in one
+        batch and retrieved together, then at most ``concurrency`` LLM calls
+        run at a time. Answers come straight from the retrieved context,
+        without the chat agent ``run`` uses, and are returned in the order
+        of ``prompts``.
+        """
+        with self.metric_tags(key_name):
+            index = self.get_index(key_name)
+            unique = list(dict.fromkeys(prompts))
+            if not unique:
+                return []
+
+            start = time.perf_counter()
+            with Metrics.timer("batch_retrieve"), ThreadPoolExecutor(
+                max_workers=concurrency
+            ) as executor:
+                embeddings = await asyncio.to_thread(embed_queries, unique)
+                bundles = [
+                    QueryBundle(query_str=prompt, embedding=embedding)
+                    for prompt, embedding in zip(unique, embeddings)
+                ]
+                retrieved = await asyncio.to_thread(
+                    retrieve_batch, index, bundles, similarity_top_k, executor
+                )
+            retrieve_seconds = (time.perf_counter() - start) / len(unique)
+
+            synthesizer = get_response_synthesizer()
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def answer(bundle, nodes):
+                async with semaphore:
+                    start = time.perf_counter()
+                    result = BatchAnswer(
+                        bundle.query_str, retrieve_seconds=retrieve_seconds
+                    )
+                    try:
+                        with Metrics.timer("answer"):
+                            result.response = await synthesizer.asynthesize(
+                                bundle, nodes
+                            )
+                    except Exception as e:
+                        logger.exception("Failed to answer %r: %s", bundle.query_str, e)
+                        result.error = e
+                    result.answer_seconds = time.perf_counter() - start
+                    return result
+
+            answers = await asyncio.gather(
+                *[answer(bundle, nodes) for bundle, nodes in zip(bundles, retrieved)]
+            )
+            by_prompt = dict(zip(unique, answers))
+            return [by_prompt[prompt] for prompt in prompts]
@@ -0,0 +1,191 @@
+import contextlib
+import json
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    import msvcrt
+
+    fcntl = None
+
+
+class IndexRegistry(ABC):
+    """Maps a ``key_name`` to the id of the index built for it.
+
+    Implementations keep an in-process copy of the mapping together with the
+    version it was read at, and only reload it when the backend reports a
+    different version.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: Dict[str, str] = {}
+        self._version = None
+
+    @abstractmethod
+    def set(self, key_name: str, index_id: str):
+        pass
+
+    @abstractmethod
+    def _refresh(self):
+        """Reload the cache if the stored version changed, in one round trip."""
+        pass
+
+    def get(self, key_name: str) -> Optional[str]:
+        with self._lock:
+            self._refresh()
+            return self._cache.get(key_name)
+
+    def list_keys(self) -> List[str]:
+        with self._lock:
+            self._refresh()
+            return sorted(self._cache)
+
+
+class FileIndexRegistry(IndexRegistry):
+    def __init__(self, file_path: str = "./storage/index_registry.json"):
+        super().__init__()
+        self.file_path = file_path
+        self.lock_path = f"{file_path}.lock"
+
+    def _read(self) -> Dict[str, str]:
+        try:
+            with open(self.file_path, "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _stat_version(self):
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self):
+        version = self._stat_version()
+        if version != self._version:
+            self._cache = self._read()
+            self._version = version
+
+    def set(self, key_name: str, index_id: str):
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        # Serialise writers across processes, and replace the file atomically
+        # so readers never see a partial write.
+        with self._lock, _file_lock(self.lock_path):
+            data = self._read()
+            data[key_name] = index_id
+
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.file_path) or ".")
+            with os.fdopen(fd, "w") as file:
+                json.dump(data, file, indent=4)
+            os.replace(tmp_path, self.file_path)
+
+            self._cache = data
+            self._version = self._stat_version()
+
+
+class RedisIndexRegistry(IndexRegistry):
+    # Returns only the version when it matches the caller's, otherwise the
+    # version and the whole hash, so a lookup is always a single round trip.
+    _REFRESH_SCRIPT = """
+local version = redis.call('GET', KEYS[2]) or '0'
+if version == ARGV[1] then
+    return {version}
+end
+return {version, redis.call('HGETALL', KEYS[1])}
+"""
+
+    def __init__(self, client, namespace: str):
+        super().__init__()
+        self.client = client
+        self.hash_key = f"{namespace}/index_registry"
+        self.version_key = f"{namespace}/index_registry/version"
+        self._refresh_script = self.client.register_script(self._REFRESH_SCRIPT)
+
+    def _refresh(self):
+        result = self._refresh_script(
+            keys=[self.hash_key, self.version_key],
+            args=[self._version or ""],
+        )
+        version = _decode(result[0])
+        if len(result) > 1:
+            items = result[1]
+            self._cache = {
+                _decode(items[i]): _decode(items[i + 1])
+                for i in range(0, len(items), 2)
+            }
+        self._version = version
+
+    def set(self, key_name: str, index_id: str):
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self.hash_key, key_name, index_id)
+            pipe.incr(self.version_key)
+            pipe.execute()
+
+
+class MongoIndexRegistry(IndexRegistry):
+    def __init__(self, db, namespace: str, collection: str = "index_registry"):
+        super().__init__()
+        self.collection = db[collection]
+        self.namespace = namespace
+
+    def _refresh(self):
+        # Matches nothing while the cached version is current.
+        doc = self.collection.find_one(
+            {"_id": self.namespace, "version": {"$ne": self._version}}
+        )
+        if doc is not None:
+            self._cache = {
+                unquote(field): index_id
+                for field, index_id in doc.get("indexes", {}).items()
+            }
+            self._version = doc["version"]
+
+    def set(self, key_name: str, index_id: str):
+        # A single-document update, so the mapping and its version change
+        # atomically.
+        self.collection.update_one(
+            {"_id": self.namespace},
+            {
+                "$set": {f"indexes.{_encode_field(key_name)}": index_id},
+                "$inc": {"version": 1},
+            },
+            upsert=True,
+        )
+
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    with open(path, "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+            return
+        # msvcrt.locking gives up after ten one-second attempts; keep waiting.
+        while True:
+            try:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                pass
+        try:
+            yield
+        finally:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _encode_field(key_name: str) -> str:
+    # "." and "$" are not allowed in field paths; "%" is escaped as well so
+    # that unquote() restores the original key exactly.
+    return key_name.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
@@ -1,20 +1,30 @@
+import json
 from abc import ABC, abstractmethod
-from typing import Type, Dict
+from typing import Type, Dict, List, Optional
 
 import chromadb
+import redis
+import redis.asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
 
 from llama_index.core import (
     StorageContext,
 )
+from llama_index.core.schema import BaseNode
+from llama_index.core.storage.docstore.utils import json_to_doc
 from llama_index.storage.docstore.redis import RedisDocumentStore
 from llama_index.storage.index_store.redis import RedisIndexStore
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from llama_index.storage.docstore.mongodb import MongoDocumentStore
 from llama_index.storage.index_store.mongodb import MongoIndexStore
 from llama_index.storage.kvstore.redis import RedisKVStore as RedisCache
+from llama_index.storage.kvstore.mongodb import MongoDBKVStore
 
 from webchatai.agent.chat.config import Config
+from webchatai.agent.chat.registry import MongoIndexRegistry, RedisIndexRegistry
+
+DEFAULT_BATCH_SIZE = 100
 
 
 class Store(ABC):
@@ -22,6 +32,10 @@ class Store(ABC):
     def get_storage_context(self):
         pass
 
+    def get_registry(self):
+        """Index registry kept in this backend, or None to use local files."""
+        return None
+
 
 class StorageFactory:
     _registry: Dict[str, Type[Store]] = {}
@@ -44,6 +58,102 @@ class StoreManager:
         return model_cls(**kwargs)
 
 
+class BulkDocumentStoreMixin(ABC):
+    """Batches the per-node lookups of a key-value docstore into bulk reads.
+
+    Subclasses implement ``_get_many`` with one round trip per batch of keys.
+    """
+
+    _prefetched_ref_docs: Optional[Dict[str, dict]] = None
+
+    @abstractmethod
+    def _get_many(self, keys: List[str], collection: str) -> Dict[str, dict]:
+        pass
+
+    def add_documents(
+        self,
+        docs,
+        allow_update: bool = True,
+        batch_size: Optional[int] = None,
+        store_text: bool = True,
+    ) -> None:
+        # The base implementation reads the ref doc info of every node one
+        # at a time before writing; fetch them all up front instead.
+        ref_doc_ids = list(
+            {doc.source_node.node_id for doc in docs if doc.source_node is not None}
+        )
+        self._prefetched_ref_docs = self._get_many(
+            ref_doc_ids, self._ref_doc_collection
+        )
+        try:
+            super().add_documents(
+                docs,
+                allow_update=allow_update,
+                batch_size=batch_size,
+                store_text=store_text,
+            )
+        finally:
+            self._prefetched_ref_docs = None
+
+    def get_ref_doc_info(self, ref_doc_id: str):
+        if self._prefetched_ref_docs is None:
+            return super().get_ref_doc_info(ref_doc_id)
+        ref_doc_info = self._prefetched_ref_docs.get(ref_doc_id)
+        if not ref_doc_info:
+            return None
+        return self._remove_legacy_info(dict(ref_doc_info))
+
+    def get_nodes(
+        self, node_ids: List[str], raise_error: bool = True
+    ) -> List[BaseNode]:
+        values = self._get_many(list(node_ids), self._node_collection)
+        nodes = []
+        for node_id in node_ids:
+            value = values.get(node_id)
+            if value is None:
+                if raise_error:
+                    raise ValueError(f"Node {node_id} not found")
+                continue
+            node = json_to_doc(value)
+            if not isinstance(node, BaseNode):
+                raise ValueError(f"Document {node_id} is not a Node.")
+            nodes.append(node)
+        return nodes
+
+
+class PipelinedRedisDocumentStore(BulkDocumentStoreMixin, RedisDocumentStore):
+    def __init__(self, redis_kvstore, redis_client, namespace: str, batch_size: int):
+        super().__init__(redis_kvstore, namespace=namespace, batch_size=batch_size)
+        self._redis_client = redis_client
+
+    def _get_many(self, keys: List[str], collection: str) -> Dict[str, dict]:
+        values = {}
+        with self._redis_client.pipeline(transaction=False) as pipe:
+            for start in range(0, len(keys), self._batch_size):
+                pipe.hmget(collection, keys[start : start + self._batch_size])
+            batches = pipe.execute()
+
+        for start, raw_values in zip(range(0, len(keys), self._batch_size), batches):
+            for key, raw in zip(keys[start : start + self._batch_size], raw_values):
+                if raw is not None:
+                    values[key] = json.loads(raw)
+        return values
+
+
+class BulkMongoDocumentStore(BulkDocumentStoreMixin, MongoDocumentStore):
+    def __init__(self, mongo_kvstore, db, namespace: str, batch_size: int):
+        super().__init__(mongo_kvstore, namespace=namespace, batch_size=batch_size)
+        self._db = db
+
+    def _get_many(self, keys: List[str], collection: str) -> Dict[str, dict]:
+        values = {}
+        for start in range(0, len(keys), self._batch_size):
+            batch = keys[start : start + self._batch_size]
+            for doc in self._db[collection].find({"_id": {"$in": batch}}):
+                values[doc.pop("_id")] = doc
+        return values
+
+
 @StorageFactory.register("chromadb")
 class ChromaStorage(Store):
     def __init__(self, collection_name: str, config: Config):
@@ -63,60 +173,157 @@ class ChromaStorage(Store):
 
 @StorageFactory.register("redis")
 class RedisStore(Store):
-    def __init__(self, host: str, port: int, namespace: str, uri: str = None):
-        self.docstore = RedisDocumentStore.from_host_and_port(
-            host=host, port=port, namespace=namespace
-        )
-        self.index_store = RedisIndexStore.from_host_and_port(
-            host=host, port=port, namespace=namespace
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        namespace: str,
+        uri: str = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_connections: int = None,
+        client=None,
+        async_client=None,
+    ):
+        # One pooled client is shared by the docstore, the index store and the
+        # cache instead of each of them opening its own connections.
+        if client is not None and async_client is None:
+            async_client = _async_redis_client(client)
+        if client is None:
+            pool_options = {"max_connections": max_connections}
+            if uri:
+                client = redis.Redis.from_url(uri, **pool_options)
+                async_client = redis.asyncio.Redis.from_url(uri, **pool_options)
+            else:
+                client = redis.Redis(host=host, port=port, **pool_options)
+                async_client = redis.asyncio.Redis(host=host, port=port, **pool_options)
+        self.client = client
+        self.batch_size = batch_size
+
+        kvstore = RedisCache(redis_client=self.client, async_redis_client=async_client)
+        self.docstore = PipelinedRedisDocumentStore(
+            kvstore, self.client, namespace=namespace, batch_size=batch_size
         )
+        self.index_store = RedisIndexStore(kvstore, namespace=namespace)
         self.storage_context = StorageContext.from_defaults(
             docstore=self.docstore, index_store=self.index_store
         )
-        self.cache = RedisCache.from_host_and_port(host, port)
+        self.cache = kvstore
+        self.registry = RedisIndexRegistry(self.client, namespace=namespace)
 
     def get_storage_context(self) -> StorageContext:
         return self.storage_context
 
+    def get_registry(self):
+        return self.registry
+
     def add_key(self, key, value):
         self.cache.put(key, value)
 
+    def add_keys(self, items: Dict[str, dict]):
+        self.cache.put_all(list(items.items()), batch_size=self.batch_size)
+
     def get_val(self, key):
         return self.cache.get(key)
 
 
 @StorageFactory.register("mongodb")
 class MongoDBStore(Store):
-    def __init__(self, host: str, port: int, namespace: str, uri: str = None):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        namespace: str,
+        uri: str = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_connections: int = None,
+        client=None,
+        async_client=None,
+    ):
+        db_name = "webchatai"
+        collection = "webchatai"
 
-        if uri:
-            self.docstore = MongoDocumentStore.from_uri(
-                db_name="webchatai", uri=uri, namespace=namespace
-            )
-            self.index_store = MongoIndexStore.from_uri(
-                db_name="webchatai", uri=uri, namespace=namespace
-            )
-        else:
-            self.docstore = MongoDocumentStore.from_host_and_port(
-                db_name="webchatai", host=host, port=port, namespace=namespace
-            )
-            self.index_store = MongoIndexStore.from_host_and_port(
-                db_name="webchatai", host=host, port=port, namespace=namespace
-            )
+        # One pooled client is shared by the docstore, the index store and the
+        # cache instead of each of them opening its own connections. The Motor
+        # client serves their async methods.
+        if client is None:
+            pool_options = {}
+            if max_connections:
+                pool_options["maxPoolSize"] = max_connections
+            if uri:
+                client = MongoClient(uri, **pool_options)
+                async_client = AsyncIOMotorClient(uri, **pool_options)
+            else:
+                client = MongoClient(host=host, port=port, **pool_options)
+                async_client = AsyncIOMotorClient(host=host, port=port, **pool_options)
+        self.cache = client
+        self.batch_size = batch_size
+        self.db = self.cache[db_name]
+        self.collection = self.db[collection]
 
+        kvstore = MongoDBKVStore(
+            mongo_client=self.cache, mongo_aclient=async_client, db_name=db_name
+        )
+        self.docstore = BulkMongoDocumentStore(
+            kvstore, self.db, namespace=namespace, batch_size=batch_size
+        )
+        self.index_store = MongoIndexStore(kvstore, namespace=namespace)
         self.storage_context = StorageContext.from_defaults(
             docstore=self.docstore, index_store=self.index_store
         )
-
-        if uri:
-            self.cache = MongoClient(uri)
-        else:
-            self.cache = MongoClient(host=host, port=port)
-
-        db_name = "webchatai"
-        collection = "webchatai"
-        self.db = self.cache[db_name]
-        self.collection = self.db[collection]
+        self.registry = MongoIndexRegistry(self.db, namespace=namespace)
 
     def get_storage_context(self) -> StorageContext:
         return self.storage_context
+
+    def get_registry(self):
+        return self.registry
+
+
+# Async connection classes matching the sync ones of an injected client.
+ASYNC_REDIS_CONNECTIONS = {
+    redis.connection.Connection: redis.asyncio.connection.Connection,
+    redis.connection.SSLConnection: redis.asyncio.connection.SSLConnection,
+    redis.connection.UnixDomainSocketConnection: (
+        redis.asyncio.connection.UnixDomainSocketConnection
+    ),
+}
+# Connection options holding sync objects; the async client keeps its own.
+SYNC_REDIS_OPTIONS = ("retry", "redis_connect_func")
+
+
+def _async_redis_client(client):
+    """Async counterpart of an injected ``redis.Redis`` client, if it has one.
+
+    The connection options of the client, including TLS and unix socket
+    settings, are forwarded. Raises ``ValueError`` for options the async
+    client does not support; pass ``async_client`` explicitly then.
+    """
+    if type(client) is not redis.Redis:
+        return None
+    pool = client.connection_pool
+    connection_class = ASYNC_REDIS_CONNECTIONS.get(pool.connection_class)
+    if connection_class is None:
+        raise ValueError(
+            f"No async counterpart of {pool.connection_class.__name__}, "
+            "pass async_client to the store"
+        )
+    # Unset options are left out, some of them only exist for sync clients.
+    kwargs = {
+        key: value
+        for key, value in pool.connection_kwargs.items()
+        if key not in SYNC_REDIS_OPTIONS and value is not None and value is not False
+    }
+    try:
+        connection_class(**kwargs)
+    except TypeError as e:
+        raise ValueError(
+            f"Cannot derive an async client from the given client ({e}), "
+            "pass async_client to the store"
+        )
+    return redis.asyncio.Redis(
+        connection_pool=redis.asyncio.ConnectionPool(
+            connection_class=connection_class,
+            max_connections=pool.max_connections,
+            **kwargs,
+        )
+    )
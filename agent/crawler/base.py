@@ -1,5 +1,7 @@
 import asyncio
+import contextlib
 import json
+import logging
 from collections import deque
 from typing import List, Set
 
@@ -8,12 +10,16 @@ from crawl4ai import (
 )
 
 from webchatai.agent.crawler.config import Crawl4AIConfig
+from webchatai.agent.crawler.offload import ContentExtractor
 from webchatai.agent.crawler.sitemeta import SitemapCrawler, RobotsHandler
 from webchatai.agent.crawler import URLUtils
+from webchatai.agent.metrics import Metrics
+
+logger = logging.getLogger(__name__)
 
 
 class WebCrawler:
-    def __init__(self, crawler_config=None, politness=2, max_concurrent=10):
+    def __init__(self, crawler_config=None, politness=2, max_concurrent=2):
         self.url_utils = URLUtils()
         self.sitemap_crawler = SitemapCrawler()
         self.robots_handler = RobotsHandler()
@@ -34,9 +40,10 @@ class WebCrawler:
         async with AsyncWebCrawler(
             config=self.crawler_config.browser_config
         ) as crawler:
-            result = await crawler.arun(
-                url=url, config=self.crawler_config.crawl_config
-            )
+            with Metrics.timer("fetch", key_name=filename):
+                result = await crawler.arun(
+                    url=url, config=self.crawler_config.crawl_config
+                )
 
             if result.success:
                 filename = f"""./data/{filename}.jsonl"""
@@ -44,11 +51,12 @@ class WebCrawler:
                 if len(result.links.get("internal")):
                     internal_links = result.links.get("internal")
 
-                    filtered_links = [
-                        link["href"]
-                        for link in internal_links
-                        if self.crawler_config.filter_links(link.get("href", ""))
-                    ]
+                    with Metrics.timer("filter_links"):
+                        filtered_links = [
+                            link["href"]
+                            for link in internal_links
+                            if self.crawler_config.filter_links(link.get("href", ""))
+                        ]
 
                     with open(filename, "a", encoding="utf-8") as f:
                         for link in filtered_links:
@@ -80,12 +88,14 @@ class WebCrawler:
                     continue
                 seen_urls.add(curr_url)
 
-                print(f"Crawling ({depth}): {curr_url}")
+                logger.info("Crawling (%d): %s", depth, curr_url)
                 try:
-                    result = await crawler.arun(
-                        url, config=self.crawler_config.crawl_config
-                    )
+                    with Metrics.timer("fetch", domain=orig_domain):
+                        result = await crawler.arun(
+                            curr_url, config=self.crawler_config.crawl_config
+                        )
                     if result.success:
+                        Metrics.increment("pages_crawled", domain=orig_domain)
                         for link in result.links.get("internal", []):
                             normalized = self.url_utils.normalize_url(link["href"])
                             if self.url_utils.is_valid_url(normalized):
@@ -97,9 +107,11 @@ class WebCrawler:
                                 ):
                                     queue.append((normalized, depth + 1))
                     else:
-                        print(f"[ERROR] {result.error_message}")
+                        Metrics.increment("pages_failed", domain=orig_domain)
+                        logger.error("%s", result.error_message)
                 except Exception as e:
-                    print(f"[EXCEPTION] Error crawling {curr_url}: {e}")
+                    Metrics.increment("pages_failed", domain=orig_domain)
+                    logger.exception("Error crawling %s: %s", curr_url, e)
         return site_urls
 
     async def crawl_parallel(
@@ -109,45 +121,67 @@ class WebCrawler:
     ):
         """Crawl multiple URLs in parallel with a concurrency limit."""
 
-        async with AsyncWebCrawler(
-            config=self.crawler_config.browser_config
-        ) as crawler:
+        async with contextlib.AsyncExitStack() as stack:
+            crawler = await stack.enter_async_context(
+                AsyncWebCrawler(config=self.crawler_config.browser_config)
+            )
+            extractor = None
+            if self.crawler_config.offload_workers:
+                extractor = stack.enter_context(
+                    ContentExtractor(
+                        self.crawler_config.md_generator,
+                        self.crawler_config.filter_text,
+                        workers=self.crawler_config.offload_workers,
+                    )
+                )
 
-            semaphore = asyncio.Semaphore(self.politeness)
+            semaphore = asyncio.Semaphore(self.max_concurrent)
 
             async def process_url(url: str):
                 async with semaphore:
                     await asyncio.sleep(self.politeness)
                     try:
-                        result = await crawler.arun(
-                            url=url,
-                            config=self.crawler_config.crawl_config,
-                            session_id="session1",
-                        )
+                        with Metrics.timer("fetch", key_name=filename):
+                            result = await crawler.arun(
+                                url=url,
+                                config=self.crawler_config.crawl_config,
+                                session_id="session1",
+                            )
 
                         if result.success:
-                            print(f"Successfully crawled: {url}")
+                            Metrics.increment("pages_crawled", key_name=filename)
+                            logger.info("Successfully crawled: %s", url)
 
-                            with open(f"""./data/{filename}.md""", "a") as f:
+                            if extractor is not None:
+                                with Metrics.timer("markdown", key_name=filename):
+                                    markdown = await extractor.extract(
+                                        extractor.source_html(result), url
+                                    )
+                            else:
+                                markdown = result.markdown_v2.raw_markdown
                                 if self.crawler_config.filter_text:
-                                    f.write(
-                                        self.crawler_config.filter_text(
-                                            result.markdown_v2.raw_markdown
+                                    with Metrics.timer(
+                                        "filter_text", key_name=filename
+                                    ):
+                                        markdown = self.crawler_config.filter_text(
+                                            markdown
                                         )
-                                    )
-                                else:
-                                    f.write(result.markdown_v2.raw_markdown)
+                            with open(f"""./data/{filename}.md""", "a") as f:
+                                f.write(markdown)
                         else:
-                            print(f"Failed: {url} - Error: {result.error_message}")
+                            Metrics.increment("pages_failed", key_name=filename)
+                            logger.error(
+                                "Failed: %s - Error: %s", url, result.error_message
+                            )
                     except Exception as e:
-                        print(f"Exception while crawling {url}: {e}")
+                        Metrics.increment("pages_failed", key_name=filename)
+                        logger.exception("Exception while crawling %s: %s", url, e)
 
             await asyncio.gather(*[process_url(url) for url in urls])
 
     async def get_data(self, url, filename):
         all_urls = self.sitemap_crawler.crawl_sitemap(url)
-        print("out")
-        print(all_urls)
+        logger.info("Found %d URLs in the sitemap of %s", len(all_urls), url)
 
         # if not len(all_urls) :
         # all_urls = await self.get_website_urls(url, filename)
@@ -1,3 +1,5 @@
+import copy
+
 from crawl4ai import (
     BrowserConfig,
     CrawlerRunConfig,
@@ -6,6 +8,8 @@ from crawl4ai import (
 )
 from crawl4ai.content_filter_strategy import PruningContentFilter
 
+from webchatai.agent.crawler.offload import PassthroughMarkdownGenerator
+
 
 class Crawl4AIConfig:
     def __init__(
@@ -16,6 +20,7 @@ class Crawl4AIConfig:
         browser_config=None,
         crawl_config=None,
         content_filter=None,
+        offload_workers=None,
     ):
 
         if md_generator is None:
@@ -46,5 +51,26 @@ class Crawl4AIConfig:
         else:
             self.crawl_config = crawl_config
 
+        if offload_workers:
+            # Markdown is generated by the worker processes from the cleaned
+            # HTML instead of on the event loop, with the generator the crawl
+            # config would have used. A given crawl_config is copied, not
+            # modified.
+            crawl_generator = getattr(self.crawl_config, "markdown_generator", None)
+            if md_generator is None and crawl_config is not None and crawl_generator:
+                self.md_generator = crawl_generator
+            self.crawl_config = _with_markdown_generator(
+                self.crawl_config, PassthroughMarkdownGenerator()
+            )
+
         self.filter_text = filter_text
         self.filter_links = filter_links
+        self.offload_workers = offload_workers
+
+
+def _with_markdown_generator(crawl_config, md_generator):
+    if hasattr(crawl_config, "clone"):
+        return crawl_config.clone(markdown_generator=md_generator)
+    crawl_config = copy.copy(crawl_config)
+    crawl_config.markdown_generator = md_generator
+    return crawl_config
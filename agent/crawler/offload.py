@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+from crawl4ai.markdown_generation_strategy import MarkdownGenerationStrategy
+from crawl4ai.models import MarkdownGenerationResult
+from crawl4ai.utils import preprocess_html_for_schema
+
+logger = logging.getLogger(__name__)
+
+# Set once per worker process by the pool initializer, so the generator and
+# filter are pickled once per worker instead of once per page.
+_worker_md_generator = None
+_worker_filter_text = None
+_worker_content_source = None
+
+
+class PassthroughMarkdownGenerator(MarkdownGenerationStrategy):
+    """Skips markdown generation inside crawl4ai.
+
+    Used when markdown is produced by a ``ContentExtractor`` instead, so the
+    event loop does not convert every page twice.
+    """
+
+    def generate_markdown(self, *args, **kwargs) -> MarkdownGenerationResult:
+        return MarkdownGenerationResult(
+            raw_markdown="",
+            markdown_with_citations="",
+            references_markdown="",
+        )
+
+
+def _init_worker(md_generator, filter_text, content_source):
+    global _worker_md_generator, _worker_filter_text, _worker_content_source
+    _worker_md_generator = md_generator
+    _worker_filter_text = filter_text
+    _worker_content_source = content_source
+
+
+def _extract(html: bytes, url: str) -> str:
+    html = html.decode("utf-8")
+    if _worker_content_source == "fit_html":
+        # Same preprocessing crawl4ai applies to produce fit_html.
+        html = preprocess_html_for_schema(html, text_threshold=500, max_size=300_000)
+    result = _worker_md_generator.generate_markdown(html, base_url=url)
+    markdown = result.raw_markdown
+    if _worker_filter_text:
+        markdown = _worker_filter_text(markdown)
+    return markdown
+
+
+class ContentExtractor:
+    """Runs markdown generation and ``filter_text`` in worker processes.
+
+    Only the HTML the generator's ``content_source`` selects is sent to a
+    worker, as UTF-8 bytes, and the markdown comes back. ``md_generator`` and ``filter_text`` must be
+    picklable, e.g. module-level functions rather than lambdas.
+    """
+
+    def __init__(self, md_generator, filter_text=None, workers: int = None):
+        try:
+            pickle.dumps((md_generator, filter_text))
+        except Exception as e:
+            raise ValueError(
+                "md_generator and filter_text must be picklable to run in "
+                f"worker processes: {e}"
+            )
+        self.content_source = getattr(md_generator, "content_source", "cleaned_html")
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(md_generator, filter_text, self.content_source),
+        )
+
+    def source_html(self, result) -> str:
+        """The HTML of a crawl result that crawl4ai would convert inline."""
+        if self.content_source in ("raw_html", "fit_html"):
+            return result.html
+        return result.cleaned_html or result.html
+
+    async def extract(self, html: str, url: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.pool, _extract, html.encode("utf-8"), url
+        )
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
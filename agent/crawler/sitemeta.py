@@ -1,22 +1,33 @@
+import gzip
+import logging
+
 import requests
 from collections import deque
 from typing import List, Set
 from xml.etree import ElementTree
 
 from webchatai.agent.crawler import URLUtils
+from webchatai.agent.metrics import Metrics
+
+logger = logging.getLogger(__name__)
 
 
 class SitemapCrawler:
     def parse_sitemap(self, sitemap_url: str) -> List[str]:
         """Get URLs from sitemap."""
         try:
-            response = requests.get(sitemap_url)
+            with Metrics.timer("sitemap_fetch"):
+                response = requests.get(sitemap_url)
             response.raise_for_status()
-            root = ElementTree.fromstring(response.content)
+            content = response.content
+            # Sitemaps may be served gzipped without a Content-Encoding header.
+            if content[:2] == b"\x1f\x8b":
+                content = gzip.decompress(content)
+            root = ElementTree.fromstring(content)
             namespace = {"ns": "http://www.sitemaps.org/schemas/sitemap/0.9"}
             return [loc.text for loc in root.findall(".//ns:loc", namespace)]
         except Exception as e:
-            print(f"Error fetching sitemap: {e}")
+            logger.error("Error fetching sitemap: %s", e)
             return []
 
     def crawl_sitemap(self, url: str) -> Set[str]:
@@ -32,7 +43,7 @@ class SitemapCrawler:
             visited.add(current_sitemap)
             links = self.parse_sitemap(current_sitemap)
             for link in links:
-                if link.endswith(".xml"):
+                if link.endswith((".xml", ".xml.gz")):
                     queue.append(link)
                 else:
                     all_urls.add(link)
@@ -56,7 +67,7 @@ class RobotsHandler:
                         if path:
                             disallowed_urls.append(f"{domain}{path}")
         except requests.RequestException as e:
-            print(f"Error fetching robots.txt: {e}")
+            logger.error("Error fetching robots.txt: %s", e)
         return disallowed_urls
 
     def crawl_robotstxt(self, url: str) -> Set[str]:
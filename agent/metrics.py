@@ -0,0 +1,269 @@
+import contextvars
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Type
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+_context_tags = contextvars.ContextVar("webchatai_metric_tags", default={})
+
+
+class Span:
+    def __init__(self, name: str, start: float, duration: float, tags: dict):
+        self.name = name
+        self.start = start
+        self.duration = duration
+        self.tags = tags
+
+    def __repr__(self):
+        return f"Span({self.name!r}, duration={self.duration:.6f}, tags={self.tags})"
+
+
+class MetricsExporter(ABC):
+    @abstractmethod
+    def observe(self, name: str, value: float, tags: dict):
+        """Record one sample of a histogram."""
+        pass
+
+    @abstractmethod
+    def increment(self, name: str, value: float, tags: dict):
+        """Add ``value`` to a counter."""
+        pass
+
+    def span(self, span: Span):
+        self.observe(f"{span.name}_seconds", span.duration, span.tags)
+
+
+class ExporterFactory:
+    _registry: Dict[str, Type[MetricsExporter]] = {}
+
+    @classmethod
+    def register(cls, exporter_type: str):
+        def inner_wrapper(wrapped_class: Type[MetricsExporter]):
+            cls._registry[exporter_type.lower()] = wrapped_class
+            return wrapped_class
+
+        return inner_wrapper
+
+
+class ExporterManager:
+    @staticmethod
+    def create(exporter_type: str, **kwargs) -> MetricsExporter:
+        exporter_cls = ExporterFactory._registry.get(exporter_type.lower())
+        if not exporter_cls:
+            raise ValueError(f"Exporter type '{exporter_type}' not registered")
+        return exporter_cls(**kwargs)
+
+
+@ExporterFactory.register("prometheus")
+class PrometheusExporter(MetricsExporter):
+    def __init__(self, prefix: str = "webchatai", buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, name, value, tags):
+        key = (name, tuple(sorted(tags.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def increment(self, name, value, tags):
+        key = (name, tuple(sorted(tags.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        declared = set()
+        for (name, tags), (bucket_counts, total, count) in histograms:
+            metric = f"{self.prefix}_{name}"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                labels = _labels(tags + (("le", repr(bound)),))
+                lines.append(f"{metric}_bucket{labels} {cumulative}")
+            lines.append(f"{metric}_bucket{_labels(tags + (('le', '+Inf'),))} {count}")
+            lines.append(f"{metric}_sum{_labels(tags)} {total}")
+            lines.append(f"{metric}_count{_labels(tags)} {count}")
+
+        for (name, tags), value in counters:
+            metric = f"{self.prefix}_{name}_total"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_labels(tags)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+@ExporterFactory.register("callback")
+class CallbackExporter(MetricsExporter):
+    """Forwards every finished span and sample to user callbacks."""
+
+    def __init__(
+        self,
+        on_span: Callable[[Span], None] = None,
+        on_sample: Callable[[str, float, dict], None] = None,
+    ):
+        self.on_span = on_span
+        self.on_sample = on_sample
+
+    def observe(self, name, value, tags):
+        if self.on_sample:
+            self.on_sample(name, value, tags)
+
+    def increment(self, name, value, tags):
+        if self.on_sample:
+            self.on_sample(name, value, tags)
+
+    def span(self, span):
+        if self.on_span:
+            self.on_span(span)
+        else:
+            super().span(span)
+
+
+class _Timer:
+    __slots__ = ("exporter", "name", "tags", "start")
+
+    def __init__(self, exporter, name, tags):
+        self.exporter = exporter
+        self.name = name
+        self.tags = tags
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        tags = self.tags
+        if exc_type is not None:
+            tags = {**tags, "error": exc_type.__name__}
+        self.exporter.span(Span(self.name, self.start, duration, tags))
+        return False
+
+
+class _NullContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_CONTEXT = _NullContext()
+
+
+class _TagContext:
+    __slots__ = ("tags", "token")
+
+    def __init__(self, tags):
+        self.tags = tags
+
+    def __enter__(self):
+        self.token = _context_tags.set({**_context_tags.get(), **self.tags})
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _context_tags.reset(self.token)
+        return False
+
+
+class Metrics:
+    """Process-wide instrumentation entry point.
+
+    Everything is a no-op until an exporter is installed with ``enable``.
+    """
+
+    _exporter: MetricsExporter = None
+
+    @classmethod
+    def enable(cls, exporter):
+        if isinstance(exporter, str):
+            exporter = ExporterManager.create(exporter)
+        cls._exporter = exporter
+        return exporter
+
+    @classmethod
+    def disable(cls):
+        cls._exporter = None
+
+    @classmethod
+    def exporter(cls) -> MetricsExporter:
+        return cls._exporter
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls._exporter is not None
+
+    @classmethod
+    def tags(cls, **tags):
+        """Attach tags to every metric recorded inside this context."""
+        if cls._exporter is None:
+            return _NULL_CONTEXT
+        return _TagContext(tags)
+
+    @classmethod
+    def timer(cls, name: str, **tags):
+        exporter = cls._exporter
+        if exporter is None:
+            return _NULL_CONTEXT
+        return _Timer(exporter, name, {**_context_tags.get(), **tags})
+
+    @classmethod
+    def observe(cls, name: str, value: float, **tags):
+        exporter = cls._exporter
+        if exporter is not None:
+            exporter.observe(name, value, {**_context_tags.get(), **tags})
+
+    @classmethod
+    def increment(cls, name: str, value: float = 1, **tags):
+        exporter = cls._exporter
+        if exporter is not None:
+            exporter.increment(name, value, {**_context_tags.get(), **tags})
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(tags) -> str:
+    if not tags:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in tags) + "}"
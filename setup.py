@@ -14,6 +14,12 @@ setup(
     license="MIT",
     packages=find_packages(),
     install_requires=[],
+    extras_require={"bench": ["fakeredis", "mongomock"]},
+    entry_points={
+        "console_scripts": [
+            "webchatai-bench=webchatai.agent.benchmarks.__main__:main",
+        ],
+    },
     keywords=["python", "first package"],
     classifiers=[
         "Intended Audience :: Developers",
@@ -0,0 +1,151 @@
+import os
+
+import numpy as np
+import pytest
+from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
+from llama_index.core.vector_stores.types import (
+    ExactMatchFilter,
+    MetadataFilters,
+    VectorStoreQuery,
+)
+
+from webchatai.agent.chat.quantization import QuantizedVectorStore
+
+DIM = 64
+BATCH = 500
+
+
+def _clustered(count: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((20, DIM))
+    labels = rng.integers(0, len(centers), count)
+    return (centers[labels] + 0.5 * rng.standard_normal((count, DIM))).astype(
+        np.float32
+    )
+
+
+def _nodes(vectors: np.ndarray, start: int = 0):
+    return [
+        TextNode(
+            text="",
+            id_=f"node-{start + row}",
+            embedding=vector.tolist(),
+            relationships={
+                NodeRelationship.SOURCE: RelatedNodeInfo(
+                    node_id=f"doc-{(start + row) % 7}"
+                )
+            },
+        )
+        for row, vector in enumerate(vectors)
+    ]
+
+
+def _add(store, vectors: np.ndarray, start: int = 0):
+    for offset in range(0, len(vectors), BATCH):
+        store.add(_nodes(vectors[offset : offset + BATCH], start + offset))
+
+
+def _query(store, vector, top_k: int = 10):
+    return store.query(
+        VectorStoreQuery(query_embedding=vector.tolist(), similarity_top_k=top_k)
+    )
+
+
+@pytest.fixture
+def vectors():
+    return _clustered(3000)
+
+
+@pytest.mark.parametrize("mode,min_recall", [("int8", 0.95), ("binary", 0.9)])
+def test_recall(vectors, mode, min_recall):
+    store = QuantizedVectorStore(mode=mode)
+    _add(store, vectors)
+    queries = _clustered(50, seed=1)
+
+    report = store.evaluate(queries, similarity_top_k=10)
+    assert report["recall_at_10"] >= min_recall
+    assert report["compression"] > 1
+    store.close()
+
+
+@pytest.mark.parametrize("mode", ["int8", "binary"])
+def test_persist_and_reload(tmp_path, vectors, mode):
+    store = QuantizedVectorStore(mode=mode)
+    _add(store, vectors)
+    temp_vectors = store._vectors_path
+    store.persist(str(tmp_path / "default__vector_store.json"))
+
+    assert not os.path.exists(temp_vectors)
+    assert QuantizedVectorStore.is_persisted(str(tmp_path))
+    loaded = QuantizedVectorStore.from_persist_dir(str(tmp_path))
+    assert loaded.mode == mode
+    for vector in vectors[:20]:
+        expected = _query(store, vector)
+        actual = _query(loaded, vector)
+        assert actual.ids == expected.ids
+        assert actual.similarities == pytest.approx(expected.similarities)
+
+
+@pytest.mark.parametrize("mode", ["int8", "binary"])
+def test_add_after_reload_keeps_rows_aligned(tmp_path, vectors, mode):
+    persist_path = str(tmp_path / "default__vector_store.json")
+    store = QuantizedVectorStore(mode=mode)
+    _add(store, vectors[:1000])
+    store.persist(persist_path)
+    # Added but never persisted, as when the process exits before persist.
+    _add(store, vectors[1000:2000], start=1000)
+
+    loaded = QuantizedVectorStore.from_persist_path(persist_path)
+    _add(loaded, vectors[2000:], start=2000)
+    for row in (0, 999, 2000, 2999):
+        assert _query(loaded, vectors[row], top_k=1).ids == [f"node-{row}"]
+
+    # Later adds go to the copy in the directory persisted to last.
+    other_path = str(tmp_path / "other" / "default__vector_store.json")
+    loaded.persist(other_path)
+    _add(loaded, vectors[1000:1010], start=1000)
+    assert os.path.getsize(f"{persist_path}.f32") == 2000 * DIM * 4
+    assert os.path.getsize(f"{other_path}.f32") == 2010 * DIM * 4
+
+
+def test_delete_and_query_many(vectors):
+    store = QuantizedVectorStore()
+    store.add(_nodes(vectors[:10]))
+    store.delete("doc-5")
+    _add(store, vectors[10:100], start=10)
+
+    deleted, kept = store.query_many(vectors[[5, 6]], similarity_top_k=100)
+    # Only the rows of doc-5 stored at the time are deleted.
+    assert "node-5" not in deleted.ids
+    assert "node-12" in deleted.ids
+    assert kept.ids[0] == "node-6"
+    assert len(kept.ids) == 99
+    assert store.memory_bytes() > 0
+    store.close()
+
+
+def test_close_removes_temporary_vectors(vectors):
+    store = QuantizedVectorStore()
+    _add(store, vectors[:10])
+    path = store._vectors_path
+    assert os.path.exists(path)
+    store.close()
+    assert not os.path.exists(path)
+
+
+def test_rejects_metadata_filters(vectors):
+    store = QuantizedVectorStore()
+    _add(store, vectors[:10])
+    query = VectorStoreQuery(
+        query_embedding=vectors[0].tolist(),
+        similarity_top_k=1,
+        filters=MetadataFilters(filters=[ExactMatchFilter(key="doc", value=1)]),
+    )
+    with pytest.raises(ValueError):
+        store.query(query)
+    store.close()
+
+
+def test_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        QuantizedVectorStore(mode="int4")
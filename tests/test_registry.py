@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from webchatai.agent.chat.registry import (
+    FileIndexRegistry,
+    MongoIndexRegistry,
+    RedisIndexRegistry,
+)
+
+# Keys with characters that are special to MongoDB field paths or to the
+# escaping of them.
+KEYS = [f"site{i}.example.com/$path%{i}" for i in range(20)]
+
+
+@pytest.fixture(params=["file", "redis", "mongodb"])
+def make_registry(request, tmp_path):
+    """Returns a factory of registries sharing one backend, like processes do."""
+    if request.param == "file":
+        path = str(tmp_path / "index_registry.json")
+        return lambda: FileIndexRegistry(path)
+    if request.param == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        server = fakeredis.FakeServer()
+        return lambda: RedisIndexRegistry(
+            fakeredis.FakeRedis(server=server), namespace="test"
+        )
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient()["test"]
+    return lambda: MongoIndexRegistry(db, namespace="test")
+
+
+def test_concurrent_sets_are_all_kept(make_registry):
+    registries = [make_registry() for _ in KEYS]
+    with ThreadPoolExecutor(max_workers=len(KEYS)) as executor:
+        list(
+            executor.map(
+                lambda args: args[0].set(args[1], f"id-{args[1]}"),
+                zip(registries, KEYS),
+            )
+        )
+
+    registry = make_registry()
+    assert registry.list_keys() == sorted(KEYS)
+    for key in KEYS:
+        assert registry.get(key) == f"id-{key}"
+
+
+def test_concurrent_reads_during_writes(make_registry):
+    reader = make_registry()
+    writer = make_registry()
+
+    def read(_):
+        return reader.get(KEYS[0]), reader.list_keys()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        reads = executor.map(read, range(50))
+        for key in KEYS:
+            writer.set(key, f"id-{key}")
+        reads = list(reads)
+
+    for value, keys in reads:
+        assert value in (None, f"id-{KEYS[0]}")
+        assert set(keys) <= set(KEYS)
+    assert reader.list_keys() == sorted(KEYS)
+
+
+def test_cached_lookup_sees_other_writers(make_registry):
+    first = make_registry()
+    second = make_registry()
+    first.set("key", "old")
+    assert second.get("key") == "old"
+
+    # Unchanged version: the cached mapping is kept, not reloaded.
+    cache = second._cache
+    assert second.get("key") == "old"
+    assert second._cache is cache
+
+    first.set("key", "new")
+    assert second.get("key") == "new"
+    assert second.get("missing") is None
+
+
+def test_file_registry_replaces_file_atomically(tmp_path):
+    path = tmp_path / "nested" / "index_registry.json"
+    registry = FileIndexRegistry(str(path))
+    registry.set("key", "id")
+
+    assert path.exists()
+    assert FileIndexRegistry(str(path)).get("key") == "id"
+    # Only the registry and its lock file, no leftover temporary files.
+    assert sorted(p.name for p in path.parent.iterdir()) == [
+        "index_registry.json",
+        "index_registry.json.lock",
+    ]